@@ -11,8 +11,11 @@ from .models import (
     MarketOrder, StopLossOrder, OrderExecution
 )
 from Explorer.rpc import RPC
+import logging
 import uuid
 
+logger = logging.getLogger(__name__)
+
 MARKET_SYNC_ADDRESS = 'EL5MFdaF8msRaUEDu9mxSNniPSswNmNRgq'
 MARKET_QUOTE_TOKEN = 'EVR'
 
@@ -87,27 +90,27 @@ def _create_initial_sell_orders(trading_pair, address, num_orders=100, target_to
     """
     try:
         balances = RPC.listassetbalancesbyaddress(address)
-    except Exception as e:
-        print(f"RPC error: {e}")
+    except Exception:
+        logger.exception("RPC error fetching asset balances for %s", address)
         return 0
 
     if not isinstance(balances, dict):
-        print(f"Balances not a dict: {type(balances)}")
+        logger.warning("Balances not a dict: %s", type(balances))
         return 0
 
     asset_balance = balances.get(trading_pair.base_token)
     if asset_balance is None:
-        print(f"Asset {trading_pair.base_token} not found in balances: {balances}")
+        logger.warning("Asset %s not found in balances: %r", trading_pair.base_token, balances)
         return 0
 
     try:
         total_quantity = Decimal(str(asset_balance))
     except (ValueError, InvalidOperation) as e:
-        print(f"Decimal conversion error: {e}")
+        logger.warning("Decimal conversion error for %r: %s", asset_balance, e)
         return 0
 
     if total_quantity <= 0:
-        print(f"Total quantity <= 0: {total_quantity}")
+        logger.warning("Total quantity <= 0: %s", total_quantity)
         return 0
 
     quantity_per_order = total_quantity / num_orders
@@ -119,11 +122,13 @@ def _create_initial_sell_orders(trading_pair, address, num_orders=100, target_to
     end_price = price_per_token * Decimal('1.2')    # 120% of average
     price_increment = (end_price - start_price) / (num_orders - 1) if num_orders > 1 else Decimal('0')
     
-    print(f"Creating {num_orders} sell orders for {trading_pair.base_token}/{trading_pair.quote_token}")
-    print(f"Total quantity: {total_quantity}, quantity per order: {quantity_per_order}")
-    print(f"Target total revenue: {target_total_price} EVR")
-    print(f"Price per token: {price_per_token} EVR")
-    print(f"Price range: {start_price} EVR (start) to {end_price} EVR (end)")
+    logger.info(
+        "Creating %s sell orders for %s/%s: total quantity %s, %s per order, "
+        "target revenue %s EVR, price %s EVR (%s to %s EVR)",
+        num_orders, trading_pair.base_token, trading_pair.quote_token,
+        total_quantity, quantity_per_order, target_total_price,
+        price_per_token, start_price, end_price
+    )
 
     from django.contrib.auth.models import User
     
@@ -134,7 +139,7 @@ def _create_initial_sell_orders(trading_pair, address, num_orders=100, target_to
     )
     
     if not system_user:
-        print("Could not create or get system user")
+        logger.error("Could not create or get system user")
         return 0
 
     created_count = 0
@@ -154,10 +159,9 @@ def _create_initial_sell_orders(trading_pair, address, num_orders=100, target_to
             )
             created_count += 1
         
-        print(f"Successfully created {created_count} sell orders")
-        print(f"First order price: {start_price} EVR, Last order price: {end_price} EVR")
-    except Exception as e:
-        print(f"Error creating sell orders: {e}")
+        logger.info("Successfully created %s sell orders", created_count)
+    except Exception:
+        logger.exception("Error creating sell orders after %s created", created_count)
         return created_count
 
     return created_count
@@ -0,0 +1,136 @@
+from django.core.mail import get_connection
+from django.conf import settings as django_settings
+import atexit
+import contextlib
+import logging
+import queue
+import smtplib
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Background email delivery retries (seconds of backoff double per attempt)
+EMAIL_MAX_ATTEMPTS = 5
+EMAIL_RETRY_BACKOFF = 1
+
+# Seconds to wait at process exit for the sender to flush queued emails
+EMAIL_SHUTDOWN_TIMEOUT = 30
+
+# Outgoing email queue, drained by a single background sender thread
+_email_queue = queue.Queue()
+_email_thread = None
+_email_thread_lock = threading.Lock()
+_EMAIL_STOP = object()  # queued at exit; the worker stops once everything before it is sent
+
+
+def _is_transient_email_error(exc):
+    """Whether a failed send is worth retrying
+    
+    Dropped connections, socket errors and 4xx replies can clear up on their
+    own; 5xx replies such as refused recipients or bad credentials cannot.
+    """
+    if isinstance(exc, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    # Any other SMTPException is a protocol-level refusal; plain OSErrors are network trouble
+    return not isinstance(exc, smtplib.SMTPException)
+
+
+def _send_message(connection, email):
+    """Send one email on the shared connection, retrying transient failures
+    
+    Runs off the request thread, so failures are logged rather than raised.
+    """
+    for attempt in range(1, EMAIL_MAX_ATTEMPTS + 1):
+        try:
+            # No-op while the session is open; reconnects after a failed attempt.
+            # send_messages on a closed backend would open and close its own session
+            connection.open()
+            connection.send_messages([email])
+            return
+        except OSError as exc:
+            # smtplib.SMTPException and socket errors are both OSError subclasses.
+            # Drop the possibly broken session; the next attempt reconnects
+            with contextlib.suppress(OSError):
+                connection.close()
+            if not _is_transient_email_error(exc):
+                logger.exception(f'Email to {email.to} was permanently rejected')
+                return
+            if attempt == EMAIL_MAX_ATTEMPTS:
+                logger.exception(f'Failed to send email to {email.to} after {attempt} attempts')
+                return
+            time.sleep(EMAIL_RETRY_BACKOFF * 2 ** (attempt - 1))
+        except Exception:
+            logger.exception(f'Failed to send email to {email.to}')
+            return
+
+
+def _send_batch(batch):
+    """Send queued emails over one SMTP connection
+    
+    Each message is sent and retried on its own, so a message the server
+    rejects is dropped without holding back the rest of the batch.
+    """
+    # Opened by the first send and reused for the rest of the batch
+    connection = get_connection(fail_silently=False)
+    try:
+        for email in batch:
+            _send_message(connection, email)
+    finally:
+        with contextlib.suppress(OSError):
+            connection.close()
+
+
+def _email_worker():
+    """Drain the outgoing email queue in batches of up to EMAIL_BATCH_SIZE"""
+    while True:
+        email = _email_queue.get()
+        if email is _EMAIL_STOP:
+            return
+        batch = [email]
+        stopping = False
+        while len(batch) < django_settings.EMAIL_BATCH_SIZE:
+            try:
+                email = _email_queue.get_nowait()
+            except queue.Empty:
+                break
+            if email is _EMAIL_STOP:
+                stopping = True
+                break
+            batch.append(email)
+        _send_batch(batch)
+        if stopping:
+            return
+
+
+def queue_email(email):
+    """Hand an EmailMessage to the background sender, starting it on first use"""
+    global _email_thread
+    _email_queue.put(email)
+    with _email_thread_lock:
+        if _email_thread is None or not _email_thread.is_alive():
+            _email_thread = threading.Thread(target=_email_worker, name='email-sender', daemon=True)
+            _email_thread.start()
+
+
+def _stop_email_worker():
+    """Let the sender flush queued emails before the process exits
+    
+    The sender is a daemon thread so it never holds the process open on its
+    own; without this, emails still queued when a worker recycles would be
+    lost silently.
+    """
+    with _email_thread_lock:
+        thread = _email_thread
+    if thread is None or not thread.is_alive():
+        return
+    _email_queue.put(_EMAIL_STOP)
+    thread.join(EMAIL_SHUTDOWN_TIMEOUT)
+    if thread.is_alive():
+        logger.error(f'Email sender did not finish within {EMAIL_SHUTDOWN_TIMEOUT}s; '
+                     f'about {_email_queue.qsize()} email(s) left unsent')
+
+
+atexit.register(_stop_email_worker)
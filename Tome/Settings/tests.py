@@ -1,3 +1,150 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, override_settings
+from django.core.mail import EmailMessage
+from unittest import mock
+import queue
+import smtplib
+from . import emails
 
-# Create your tests here.
+
+class StubConnection:
+    """Email backend stand-in that fails chosen messages a set number of times
+
+    Like Django's SMTP backend, send_messages on a closed connection opens a
+    session just for that call, so ``opened`` counts every session started.
+    """
+
+    def __init__(self, failures=None):
+        # subject -> list of exceptions to raise on successive sends of that message
+        self.failures = failures or {}
+        self.sent = []
+        self.opened = 0
+        self.is_open = False
+
+    def open(self):
+        if self.is_open:
+            return False
+        self.opened += 1
+        self.is_open = True
+        return True
+
+    def send_messages(self, messages):
+        new_conn_created = self.open()
+        try:
+            for message in messages:
+                errors = self.failures.get(message.subject)
+                if errors:
+                    raise errors.pop(0)
+                self.sent.append(message.subject)
+        finally:
+            if new_conn_created:
+                self.close()
+        return len(messages)
+
+    def close(self):
+        self.is_open = False
+
+
+def make_email(subject):
+    return EmailMessage(subject, 'body', 'from@example.com', [f'{subject}@example.com'])
+
+
+@mock.patch.object(emails.time, 'sleep')
+class SendBatchTestCase(SimpleTestCase):
+    def send(self, subjects, failures=None):
+        connection = StubConnection(failures)
+        with mock.patch.object(emails, 'get_connection', return_value=connection):
+            emails._send_batch([make_email(subject) for subject in subjects])
+        return connection
+
+    def test_send_batch_delivers_every_message(self, sleep):
+        """Test that a batch goes out over one connection"""
+        connection = self.send(['a', 'b', 'c'])
+
+        self.assertEqual(connection.sent, ['a', 'b', 'c'])
+        self.assertEqual(connection.opened, 1)
+        sleep.assert_not_called()
+
+    @override_settings(EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend')
+    def test_send_batch_uses_one_smtp_session(self, sleep):
+        """Test that the real SMTP backend connects once for a whole batch"""
+        with mock.patch('django.core.mail.backends.smtp.smtplib.SMTP') as smtp:
+            emails._send_batch([make_email(subject) for subject in 'abcde'])
+
+        self.assertEqual(smtp.call_count, 1)
+        self.assertEqual(smtp.return_value.sendmail.call_count, 5)
+
+    def test_send_batch_retries_failed_message(self, sleep):
+        """Test that a message that fails once is retried and delivered"""
+        connection = self.send(['a', 'b'], {'a': [smtplib.SMTPServerDisconnected()]})
+
+        self.assertEqual(connection.sent, ['a', 'b'])
+        # The failed session is dropped and one new session carries the rest
+        self.assertEqual(connection.opened, 2)
+        self.assertEqual(sleep.call_count, 1)
+
+    def test_send_batch_failure_does_not_drop_rest_of_batch(self, sleep):
+        """Test that a message that never sends does not hold back the others"""
+        failures = {'bad': [smtplib.SMTPServerDisconnected()] * emails.EMAIL_MAX_ATTEMPTS}
+
+        with self.assertLogs(emails.logger, 'ERROR'):
+            connection = self.send(['a', 'bad', 'c', 'd'], failures)
+
+        self.assertEqual(connection.sent, ['a', 'c', 'd'])
+
+    def test_send_batch_does_not_retry_permanent_failures(self, sleep):
+        """Test that 5xx refusals are logged at once instead of retried"""
+        failures = {
+            'refused': [smtplib.SMTPRecipientsRefused({'refused@example.com': (550, b'No such user')})],
+            'auth': [smtplib.SMTPAuthenticationError(535, b'Bad credentials')],
+        }
+
+        with self.assertLogs(emails.logger, 'ERROR') as logs:
+            connection = self.send(['refused', 'auth', 'c'], failures)
+
+        self.assertEqual(connection.sent, ['c'])
+        self.assertEqual(len(logs.records), 2)
+        sleep.assert_not_called()
+
+    def test_send_batch_retries_temporary_smtp_reply(self, sleep):
+        """Test that a 4xx reply is treated as transient"""
+        connection = self.send(['a'], {'a': [smtplib.SMTPSenderRefused(451, b'Try again later', 'from@example.com')]})
+
+        self.assertEqual(connection.sent, ['a'])
+        self.assertEqual(sleep.call_count, 1)
+
+
+class EmailWorkerTestCase(SimpleTestCase):
+    def setUp(self):
+        self.email_queue = queue.Queue()
+        self.batches = []
+        patches = [
+            mock.patch.object(emails, '_email_queue', self.email_queue),
+            mock.patch.object(emails, '_email_thread', None),
+            mock.patch.object(emails, '_send_batch', lambda batch: self.batches.append(
+                [email.subject for email in batch]
+            )),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    @override_settings(EMAIL_BATCH_SIZE=2)
+    def test_email_worker_sends_in_batches(self):
+        """Test that the worker groups queued emails up to EMAIL_BATCH_SIZE"""
+        for subject in ['a', 'b', 'c']:
+            self.email_queue.put(make_email(subject))
+        self.email_queue.put(emails._EMAIL_STOP)
+
+        emails._email_worker()
+
+        self.assertEqual(self.batches, [['a', 'b'], ['c']])
+
+    def test_stop_email_worker_flushes_queue(self):
+        """Test that emails queued before exit are sent before the sender stops"""
+        for subject in ['a', 'b', 'c']:
+            emails.queue_email(make_email(subject))
+
+        emails._stop_email_worker()
+
+        self.assertFalse(emails._email_thread.is_alive())
+        self.assertEqual(sum(self.batches, []), ['a', 'b', 'c'])
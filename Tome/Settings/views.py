@@ -2,22 +2,51 @@ from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_http_methods
 from django.contrib import messages
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage
 from django.conf import settings as django_settings
+from django.template.loader import render_to_string
+from django.db import transaction
+import logging
 from django.urls import reverse
 from User.models import EmailVerification
 from .models import UserProfile
+from .emails import queue_email
+
+logger = logging.getLogger(__name__)
+
+# Theme lookups built once from the model choices
+THEME_DISPLAY = dict(UserProfile.THEME_CHOICES)
+VALID_THEMES = frozenset(THEME_DISPLAY)
+
+# Verification email body; the cached template loader compiles it once per process
+VERIFICATION_EMAIL_TEMPLATE = 'settings/emails/verify.txt'
+
+
+def _get_email_verification(user):
+    """Return the user's EmailVerification, creating it for accounts that predate it
+    
+    Registration creates the record and the auth backend joins it onto
+    request.user, so the related descriptor normally answers without a query.
+    """
+    try:
+        return user.email_verification
+    except EmailVerification.DoesNotExist:
+        email_verification, created = EmailVerification.objects.get_or_create(user=user)
+        return email_verification
 
 
 # Helper function to send verification email
 def send_verification_email(request, user):
     """Send email verification link to the user
     
-    Note: This function uses get_or_create which means the verification token 
-    remains the same across multiple calls for the same user. The token is only 
-    created once when the EmailVerification record is first created.
+    Note: The verification token remains the same across multiple calls for the 
+    same user. The token is only created once when the EmailVerification record 
+    is first created.
+    
+    The email is queued for a background sender once the current transaction 
+    commits, so the response does not wait on the mail server.
     """
-    email_verification, created = EmailVerification.objects.get_or_create(user=user)
+    email_verification = _get_email_verification(user)
     
     # Generate verification link
     verification_url = request.build_absolute_uri(
@@ -26,36 +55,22 @@ def send_verification_email(request, user):
     
     # Send email
     subject = 'Verify Your Email - DeFi Tome'
-    message = f"""
-    Hello {user.username},
-    
-    Thank you for registering with DeFi Tome!
-    
-    Please verify your email address by clicking the link below:
-    {verification_url}
-    
-    If you did not create an account, please ignore this email.
+    message = render_to_string(VERIFICATION_EMAIL_TEMPLATE, {
+        'username': user.username,
+        'url': verification_url,
+    })
     
-    Best regards,
-    The DeFi Tome Team
-    """
-    
-    send_mail(
-        subject,
-        message,
-        django_settings.DEFAULT_FROM_EMAIL,
-        [user.email],
-        fail_silently=False,
-    )
+    email = EmailMessage(subject, message, django_settings.DEFAULT_FROM_EMAIL, [user.email])
+    transaction.on_commit(lambda: queue_email(email))
 
 
 @login_required
 def settings(request):
-    # Get or create email verification record
-    email_verification, created = EmailVerification.objects.get_or_create(user=request.user)
+    # Email verification record, already loaded with request.user
+    email_verification = _get_email_verification(request.user)
     
     # Get or create user profile for theme preference
-    user_profile, created = UserProfile.objects.get_or_create(user=request.user)
+    user_profile, created = UserProfile.objects.only('theme').get_or_create(user=request.user)
     
     context = {
         'email_verification': email_verification,
@@ -68,7 +83,7 @@ def settings(request):
 @require_http_methods(["POST"])
 def resend_verification_email(request):
     """Resend email verification link"""
-    email_verification, created = EmailVerification.objects.get_or_create(user=request.user)
+    email_verification = _get_email_verification(request.user)
     
     if email_verification.is_verified:
         messages.info(request, 'Your email is already verified.')
@@ -77,8 +92,6 @@ def resend_verification_email(request):
             send_verification_email(request, request.user)
             messages.success(request, 'Verification email has been resent. Please check your inbox.')
         except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
             logger.error(f'Failed to send verification email to {request.user.email}: {str(e)}')
             messages.error(request, f'Failed to send verification email. Please try again later.')
     
@@ -92,15 +105,12 @@ def change_theme(request):
     theme = request.POST.get('theme', 'default')
     
     # Validate theme choice against model choices
-    valid_themes = [choice[0] for choice in UserProfile.THEME_CHOICES]
-    if theme not in valid_themes:
+    if theme not in VALID_THEMES:
         messages.error(request, 'Invalid theme selection.')
         return redirect('settings')
     
-    # Get or create user profile
-    user_profile, created = UserProfile.objects.get_or_create(user=request.user)
-    user_profile.theme = theme
-    user_profile.save()
+    # Look up the profile by the unique user key only; theme goes in defaults
+    UserProfile.objects.update_or_create(user=request.user, defaults={'theme': theme})
     
-    messages.success(request, f'Theme changed to {dict(UserProfile.THEME_CHOICES)[theme]}.')
+    messages.success(request, f'Theme changed to {THEME_DISPLAY[theme]}.')
     return redirect('settings')
@@ -0,0 +1,31 @@
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+class BackgroundStreamHandler(QueueHandler):
+    """
+    Log handler that writes records to stderr from a background thread.
+    
+    Request threads only put the formatted record on a queue, so a slow or
+    blocked stream never holds up a response.
+    """
+    
+    def __init__(self):
+        super().__init__(queue.SimpleQueue())
+        self.listener = QueueListener(self.queue, logging.StreamHandler())
+        self.listener.start()
+        atexit.register(self._stop_listener)
+        # Threads don't survive fork() (preforking servers, parallel test runs),
+        # so each child starts its own listener on a fresh queue
+        os.register_at_fork(after_in_child=self._start_listener_in_child)
+    
+    def _start_listener_in_child(self):
+        self.queue = queue.SimpleQueue()
+        self.listener = QueueListener(self.queue, *self.listener.handlers)
+        self.listener.start()
+    
+    def _stop_listener(self):
+        self.listener.stop()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import sys
 from pathlib import Path
 from decouple import config
 
@@ -107,6 +108,10 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# The test suite only needs hashes to round-trip, so skip PBKDF2's key stretching there
+if 'test' in sys.argv:
+    PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
@@ -128,6 +133,38 @@ STATIC_URL = 'static/'
 # Authentication settings
 LOGIN_URL = '/user/login/'
 
+# Load the user's wallet and email verification alongside the user on every authenticated request
+AUTHENTICATION_BACKENDS = ['User.backends.UserModelBackend']
+
+# Logging
+# Project records are written to stderr by a background thread (see Tome/log.py).
+# Django's own loggers keep their default handlers, so nothing is printed twice.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'verbose': {
+            'format': '{levelname} {asctime} {name} {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'background_console': {
+            '()': 'Tome.log.BackgroundStreamHandler',
+            'formatter': 'verbose',
+        },
+    },
+    'loggers': {
+        app: {
+            'handlers': ['background_console'],
+            # INFO keeps operational summaries (e.g. initial sell order creation) visible
+            'level': 'INFO',
+            'propagate': False,
+        }
+        for app in ['API', 'DeFi', 'Explorer', 'Listings', 'Settings', 'User', 'Wallet', 'Tome']
+    },
+}
+
 # Email settings
 # Using console backend for development - emails will be printed to console
 # For production, change EMAIL_BACKEND to 'django.core.mail.backends.smtp.EmailBackend'
@@ -140,3 +177,4 @@ EMAIL_USE_SSL = config('EMAIL_USE_SSL', default=False, cast=bool)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='no-reply@defitome.com')
+EMAIL_BATCH_SIZE = config('EMAIL_BATCH_SIZE', default=50, cast=int)  # Max queued emails sent per SMTP connection
@@ -0,0 +1,27 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+UserModel = get_user_model()
+
+
+class UserModelBackend(ModelBackend):
+    """
+    ModelBackend that loads the user's one-to-one rows in the same query as the user.
+    
+    AuthenticationMiddleware resolves request.user through get_user() on every
+    request, so joining the wallet and email verification here lets views read
+    request.user.user_wallet and request.user.email_verification without
+    issuing further queries. The wallet's entropy and passphrase are deferred;
+    only the views that derive keys load them.
+    """
+    
+    def get_user(self, user_id):
+        try:
+            user = UserModel._default_manager.select_related(
+                'user_wallet', 'email_verification'
+            ).defer(
+                'user_wallet__entropy', 'user_wallet__passphrase'
+            ).get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
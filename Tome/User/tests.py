@@ -1,18 +1,46 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from decimal import Decimal
+from Listings.models import Listing, ListingItem
+from Settings.models import UserProfile
+from Wallet.models import UserWallet
+from .models import EmailVerification
+import uuid
+
+# Test-only: these tests need passwords to round-trip, not to resist brute force,
+# so use a fast hasher regardless of how the suite is launched
+fast_password_hashing = override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']
+)
+
 
 # Create your tests here.
+@fast_password_hashing
 class RegistrationTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # URLs are constant, so resolve them once per class
+        cls.register_url = reverse('register')
+    
     def setUp(self):
         self.client = Client()
-        self.register_url = reverse('register')
     
     def test_registration_page_loads(self):
         """Test that the registration page loads successfully"""
         response = self.client.get(self.register_url)
         self.assertEqual(response.status_code, 200)
     
+    def test_registration_page_anonymous_get_skips_database(self):
+        """Test that anonymous visitors load the registration page without queries"""
+        with self.assertNumQueries(0):
+            response = self.client.get(self.register_url)
+        self.assertEqual(response.status_code, 200)
+    
     def test_registration_redirects_logged_in_users(self):
         """Test that logged-in users are redirected from registration page"""
         # Create and log in a user
@@ -98,6 +126,25 @@ class RegistrationTestCase(TestCase):
         # Should only have one user with that username
         self.assertEqual(User.objects.filter(username='existing').count(), 1)
     
+    def test_duplicate_email(self):
+        """Test that registration fails with duplicate email"""
+        # Create a user first
+        User.objects.create_user(username='existing', email='existing@example.com', password='pass123')
+        
+        # Try to register with same email
+        response = self.client.post(self.register_url, {
+            'username': 'newuser',
+            'email': 'existing@example.com',
+            'password': 'testpass123',
+            'confirm_password': 'testpass123'
+        })
+        
+        # Should stay on registration page
+        self.assertEqual(response.status_code, 200)
+        
+        # New user should not be created
+        self.assertFalse(User.objects.filter(username='newuser').exists())
+    
     def test_empty_fields(self):
         """Test that registration fails with empty fields"""
         response = self.client.post(self.register_url, {
@@ -113,23 +160,38 @@ class RegistrationTestCase(TestCase):
         # No users should be created
         self.assertEqual(User.objects.count(), 0)
 
+@fast_password_hashing
 class LoginTestCase(TestCase):
-    def setUp(self):
-        self.client = Client()
-        self.login_url = reverse('login')
-        self.register_url = reverse('register')
-        # Create a test user
-        self.test_user = User.objects.create_user(
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # URLs are constant, so resolve them once per class
+        cls.login_url = reverse('login')
+        cls.register_url = reverse('register')
+    
+    @classmethod
+    def setUpTestData(cls):
+        # Create a test user once for the whole class
+        cls.test_user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
             password='testpass123'
         )
     
+    def setUp(self):
+        self.client = Client()
+    
     def test_login_page_loads(self):
         """Test that the login page loads successfully"""
         response = self.client.get(self.login_url)
         self.assertEqual(response.status_code, 200)
     
+    def test_login_page_anonymous_get_skips_database(self):
+        """Test that anonymous visitors load the login page without queries"""
+        with self.assertNumQueries(0):
+            response = self.client.get(self.login_url)
+        self.assertEqual(response.status_code, 200)
+    
     def test_login_redirects_logged_in_users(self):
         """Test that logged-in users are redirected from login page"""
         # Login the test user
@@ -197,6 +259,30 @@ class LoginTestCase(TestCase):
         # Check if user is authenticated by checking session
         self.assertNotIn('_auth_user_id', self.client.session)
     
+    def test_logout_anonymous_skips_database(self):
+        """Test that logging out without a session redirects without queries"""
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('logout'))
+        self.assertRedirects(response, self.login_url)
+    
+    def test_logout_logged_in_user(self):
+        """Test that logging out ends the user's session"""
+        self.client.login(username='testuser', password='testpass123')
+        
+        response = self.client.post(reverse('logout'))
+        
+        self.assertRedirects(response, self.login_url)
+        self.assertNotIn('_auth_user_id', self.client.session)
+    
+    def test_logout_rejects_get(self):
+        """Test that a GET to logout does not end the session"""
+        self.client.login(username='testuser', password='testpass123')
+        
+        response = self.client.get(reverse('logout'))
+        
+        self.assertEqual(response.status_code, 405)
+        self.assertIn('_auth_user_id', self.client.session)
+    
     def test_login_empty_username(self):
         """Test that login handles empty username"""
         response = self.client.post(self.login_url, {
@@ -217,18 +303,27 @@ class LoginTestCase(TestCase):
         # Should stay on login page with error message
         self.assertEqual(response.status_code, 200)
 
+@fast_password_hashing
 class HomePageAuthTestCase(TestCase):
-    def setUp(self):
-        self.client = Client()
-        self.home_url = reverse('home')
-        self.login_url = reverse('login')
-        # Create a test user
-        self.test_user = User.objects.create_user(
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # URLs are constant, so resolve them once per class
+        cls.home_url = reverse('home')
+        cls.login_url = reverse('login')
+    
+    @classmethod
+    def setUpTestData(cls):
+        # Create a test user once for the whole class
+        cls.test_user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
             password='testpass123'
         )
     
+    def setUp(self):
+        self.client = Client()
+    
     def test_home_page_requires_login(self):
         """Test that home page redirects unauthenticated users to login"""
         response = self.client.get(self.home_url)
@@ -242,11 +337,40 @@ class HomePageAuthTestCase(TestCase):
         # Login the user
         self.client.login(username='testuser', password='testpass123')
         
-        response = self.client.get(self.home_url)
+        # Session, user, theme profile get_or_create (select + savepoint insert) and listings
+        with self.assertNumQueries(7):
+            response = self.client.get(self.home_url)
         
         # Should successfully load the home page
         self.assertEqual(response.status_code, 200)
     
+    def test_home_page_listings_use_constant_queries(self):
+        """Test that recent listings render without a query per listing"""
+        for i in range(3):
+            seller = User.objects.create_user(username=f'seller{i}', password='testpass123')
+            item = ListingItem.objects.create(
+                title=f'Item {i}',
+                description='Test item',
+                individual_price=Decimal('1'),
+                total_price=Decimal('1'),
+            )
+            Listing.objects.create(
+                item=item,
+                seller=seller,
+                price=Decimal('1'),
+                token_offered='EVR',
+                preferred_token='EVR',
+            )
+        UserProfile.objects.create(user=self.test_user)
+        self.client.login(username='testuser', password='testpass123')
+        
+        # Session, user, theme profile and the single listings query
+        with self.assertNumQueries(4):
+            response = self.client.get(self.home_url)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'seller2')
+    
     def test_home_page_redirect_preserves_next_parameter(self):
         """Test that redirect to login includes next parameter"""
         response = self.client.get(self.home_url)
@@ -257,26 +381,39 @@ class HomePageAuthTestCase(TestCase):
         self.assertIn('/user/home/', response.url)
 
 
+@fast_password_hashing
 class EmailVerificationTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # URLs are constant, so resolve them once per class
+        cls.register_url = reverse('register')
+        cls.settings_url = reverse('settings')
+        cls.resend_url = reverse('resend_verification')
+    
+    @classmethod
+    def setUpTestData(cls):
+        # Create a test user once for the whole class
+        cls.test_user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+    
     def setUp(self):
         self.client = Client()
-        self.register_url = reverse('register')
-        self.settings_url = reverse('settings')
-        self.resend_url = reverse('resend_verification')
     
     def test_email_verification_created_on_registration(self):
         """Test that EmailVerification record is created when user registers"""
-        from .models import EmailVerification
-        
         response = self.client.post(self.register_url, {
-            'username': 'testuser',
-            'email': 'test@example.com',
+            'username': 'newuser',
+            'email': 'new@example.com',
             'password': 'testpass123',
             'confirm_password': 'testpass123'
         })
         
         # User should be created
-        user = User.objects.get(username='testuser')
+        user = User.objects.get(username='newuser')
         
         # EmailVerification record should exist
         self.assertTrue(EmailVerification.objects.filter(user=user).exists())
@@ -286,17 +423,29 @@ class EmailVerificationTestCase(TestCase):
         self.assertFalse(email_verification.is_verified)
         self.assertIsNotNone(email_verification.verification_token)
     
+    def test_verification_email_deferred_until_commit(self):
+        """Test that the verification email is queued rather than sent inline"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(self.register_url, {
+                'username': 'newuser',
+                'email': 'new@example.com',
+                'password': 'testpass123',
+                'confirm_password': 'testpass123'
+            })
+        
+        # Nothing is sent during the request; delivery is queued for after commit
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(len(callbacks), 1)
+    
     def test_verify_email_with_valid_token(self):
         """Test email verification with valid token"""
-        from .models import EmailVerification
-        
-        # Create user and verification record
-        user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
-        email_verification = EmailVerification.objects.create(user=user, is_verified=False)
+        # Create verification record
+        email_verification = EmailVerification.objects.create(user=self.test_user, is_verified=False)
         
-        # Visit verification URL
+        # Visit verification URL; verifying is a single UPDATE
         verify_url = reverse('verify_email', kwargs={'token': email_verification.verification_token})
-        response = self.client.get(verify_url)
+        with self.assertNumQueries(1):
+            response = self.client.get(verify_url)
         
         # Should redirect
         self.assertEqual(response.status_code, 302)
@@ -306,25 +455,38 @@ class EmailVerificationTestCase(TestCase):
         self.assertTrue(email_verification.is_verified)
         self.assertIsNotNone(email_verification.verified_at)
     
+    def test_verify_email_when_already_verified(self):
+        """Test that an already verified token keeps its original timestamp"""
+        email_verification = EmailVerification.objects.create(user=self.test_user, is_verified=False)
+        verify_url = reverse('verify_email', kwargs={'token': email_verification.verification_token})
+        self.client.get(verify_url)
+        email_verification.refresh_from_db()
+        verified_at = email_verification.verified_at
+        
+        # Visit the verification URL a second time
+        response = self.client.get(verify_url, follow=True)
+        
+        messages_list = list(response.context['messages'])
+        self.assertTrue(any('already verified' in str(m) for m in messages_list))
+        email_verification.refresh_from_db()
+        self.assertEqual(email_verification.verified_at, verified_at)
+    
     def test_verify_email_with_invalid_token(self):
         """Test email verification with invalid token"""
-        import uuid
-        
         # Use random UUID that doesn't exist
         fake_token = uuid.uuid4()
         verify_url = reverse('verify_email', kwargs={'token': fake_token})
-        response = self.client.get(verify_url)
+        # The UPDATE matches nothing, then one lookup tells invalid from already verified
+        with self.assertNumQueries(2):
+            response = self.client.get(verify_url)
         
         # Should redirect to login
         self.assertEqual(response.status_code, 302)
     
     def test_resend_verification_email_when_not_verified(self):
         """Test resending verification email when user is not verified"""
-        from .models import EmailVerification
-        
-        # Create and login user
-        user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
-        EmailVerification.objects.create(user=user, is_verified=False)
+        # Create verification record and login user
+        EmailVerification.objects.create(user=self.test_user, is_verified=False)
         self.client.login(username='testuser', password='testpass123')
         
         # Request to resend verification email
@@ -343,11 +505,8 @@ class EmailVerificationTestCase(TestCase):
     
     def test_resend_verification_when_already_verified(self):
         """Test resending verification email when already verified"""
-        from .models import EmailVerification
-        
-        # Create and login user with verified email
-        user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
-        EmailVerification.objects.create(user=user, is_verified=True)
+        # Login user with verified email
+        EmailVerification.objects.create(user=self.test_user, is_verified=True)
         self.client.login(username='testuser', password='testpass123')
         
         # Request to resend verification email
@@ -362,11 +521,8 @@ class EmailVerificationTestCase(TestCase):
     
     def test_settings_shows_verification_status(self):
         """Test that settings page shows email verification status"""
-        from .models import EmailVerification
-        
-        # Create and login user
-        user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
-        EmailVerification.objects.create(user=user, is_verified=False)
+        # Create verification record and login user
+        EmailVerification.objects.create(user=self.test_user, is_verified=False)
         self.client.login(username='testuser', password='testpass123')
         
         # Access settings page
@@ -377,3 +533,54 @@ class EmailVerificationTestCase(TestCase):
         self.assertIn('email_verification', response.context)
 
 
+
+
+class UserModelBackendTestCase(TestCase):
+    """The auth backend joins the user's one-to-one rows so views read them without extra queries"""
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.portfolio_url = reverse('portfolio')
+        cls.settings_url = reverse('settings')
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', email='test@example.com')
+        EmailVerification.objects.create(user=cls.user)
+        UserProfile.objects.create(user=cls.user)
+    
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+    
+    def test_portfolio_with_wallet_uses_joined_wallet(self):
+        """Test that the portfolio page reads the wallet from the user query"""
+        UserWallet.objects.create(user=self.user, name='Main', entropy=bytes(16))
+        
+        # Session, user joined with wallet and verification, theme
+        with self.assertNumQueries(3):
+            response = self.client.get(self.portfolio_url)
+        
+        self.assertEqual(response.context['user_wallet'].name, 'Main')
+    
+    def test_portfolio_without_wallet_skips_wallet_query(self):
+        """Test that a missing wallet is cached as missing by the user query"""
+        # Session, user joined with wallet and verification, theme
+        with self.assertNumQueries(3):
+            response = self.client.get(self.portfolio_url)
+        
+        self.assertIsNone(response.context['user_wallet'])
+    
+    def test_settings_page_skips_verification_query(self):
+        """Test that the settings page reads email verification from the user query"""
+        # Session, user joined with wallet and verification, the view's profile, theme
+        with self.assertNumQueries(4), CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.settings_url)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['email_verification'].is_verified)
+        # The only mention of the verification table is the join in the user query
+        verification_queries = [q['sql'] for q in queries if 'User_emailverification' in q['sql']]
+        self.assertEqual(len(verification_queries), 1)
+        self.assertIn('"auth_user"', verification_queries[0])
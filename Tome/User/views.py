@@ -1,14 +1,19 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.models import User
-from django.contrib.auth import login as auth_login, authenticate, logout as auth_logout
+from django.contrib.auth import SESSION_KEY, login as auth_login, authenticate, logout as auth_logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.views.decorators.http import require_http_methods
 from .models import EmailVerification
 from django.utils import timezone
 from Settings.views import send_verification_email
 from Listings.models import Listing
+import logging
+
+logger = logging.getLogger(__name__)
+
 
 # Create your views here.
 def register(request):
@@ -22,49 +27,51 @@ def register(request):
         password = request.POST.get('password', '')
         confirm_password = request.POST.get('confirm_password', '')
         
-        # Validate required fields
+        # Validate the form; the first failure found is reported below
+        error = None
         if not username or not email or not password or not confirm_password:
-            messages.error(request, 'All fields are required.')
-            return render(request, 'register/index.html')
-        
-        # Validate passwords match
-        if password != confirm_password:
-            messages.error(request, 'Passwords do not match.')
-            return render(request, 'register/index.html')
+            error = 'All fields are required.'
+        elif password != confirm_password:
+            error = 'Passwords do not match.'
+        else:
+            # Check if username or email already exists in a single query
+            existing_usernames = set(
+                User.objects.filter(Q(username=username) | Q(email=email)).values_list('username', flat=True)
+            )
+            if username in existing_usernames:
+                error = 'Username already exists.'
+            elif existing_usernames:
+                error = 'Email already registered.'
         
-        # Check if username already exists
-        if User.objects.filter(username=username).exists():
-            messages.error(request, 'Username already exists.')
-            return render(request, 'register/index.html')
+        if error is None:
+            # Create user with race condition handling
+            try:
+                # Create the user and its verification record in a single transaction
+                with transaction.atomic():
+                    user = User.objects.create_user(username=username, email=email, password=password)
+                    EmailVerification.objects.create(user=user)
+            except IntegrityError:
+                # Lost a race with a concurrent signup; username is the only unique column here
+                error = 'Username already exists.'
         
-        # Check if email already exists
-        if User.objects.filter(email=email).exists():
-            messages.error(request, 'Email already registered.')
+        if error is not None:
+            messages.error(request, error)
             return render(request, 'register/index.html')
         
-        # Create user with race condition handling
+        # Send verification email
         try:
-            user = User.objects.create_user(username=username, email=email, password=password)
-            
-            # Send verification email
-            try:
-                send_verification_email(request, user)
-                messages.info(request, 'A verification email has been sent to your email address. Please verify your email.')
-            except Exception as e:
-                # Log error but don't prevent registration
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.error(f'Failed to send verification email to {user.email}: {str(e)}')
-                messages.warning(request, 'Account created but failed to send verification email. You can resend it from settings.')
-            
-            # Log the user in
-            auth_login(request, user)
-            
-            messages.success(request, 'Registration successful!')
-            return redirect('home')
-        except IntegrityError:
-            messages.error(request, 'Username or email already exists.')
-            return render(request, 'register/index.html')
+            send_verification_email(request, user)
+            messages.info(request, 'A verification email has been sent to your email address. Please verify your email.')
+        except Exception as e:
+            # Log error but don't prevent registration
+            logger.error(f'Failed to send verification email to {user.email}: {str(e)}')
+            messages.warning(request, 'Account created but failed to send verification email. You can resend it from settings.')
+        
+        # Log the user in
+        auth_login(request, user)
+        
+        messages.success(request, 'Registration successful!')
+        return redirect('home')
     
     return render(request, 'register/index.html')
 
@@ -83,12 +90,7 @@ def login(request):
             messages.error(request, 'Both username and password are required.')
             return render(request, 'login/index.html')
         
-        # Check if username exists (per requirements: redirect to register if user doesn't exist)
-        if not User.objects.filter(username=username).exists():
-            messages.error(request, 'User does not exist. Please register first.')
-            return redirect('register')
-        
-        # Authenticate the user
+        # Authenticate the user (this already loads the user row)
         user = authenticate(request, username=username, password=password)
         
         if user is not None:
@@ -96,10 +98,15 @@ def login(request):
             auth_login(request, user)
             messages.success(request, 'Login successful!')
             return redirect('home')
-        else:
-            # Wrong password
-            messages.error(request, 'Invalid password. Please try again.')
-            return render(request, 'login/index.html')
+        
+        # Only on failure check if username exists (per requirements: redirect to register if user doesn't exist)
+        if not User.objects.filter(username=username).exists():
+            messages.error(request, 'User does not exist. Please register first.')
+            return redirect('register')
+        
+        # Wrong password
+        messages.error(request, 'Invalid password. Please try again.')
+        return render(request, 'login/index.html')
     
     return render(request, 'login/index.html')
 
@@ -107,12 +114,24 @@ def login(request):
 @login_required
 def home(request):
     # Get the 3 most recent listings
-    recent_listings = Listing.objects.all().select_related('item', 'seller').order_by('-listing_date')[:3]
+    recent_listings = (
+        Listing.objects.select_related('item', 'seller')
+        .only(
+            'price', 'quantity_available', 'listing_date',
+            'item__title', 'item__description', 'seller__username',
+        )
+        .order_by('-listing_date')[:3]
+    )
     return render(request, 'home/index.html', {'listings': recent_listings})
 
 
-@require_http_methods(["GET", "POST"])
+# Logout changes state, so only accept CSRF-protected POSTs (link prefetchers issue GETs)
+@require_http_methods(["POST"])
 def logout(request):
+    # Anonymous visitors have no auth key in their session, so skip straight to login
+    if SESSION_KEY not in request.session:
+        return redirect('login')
+    
     if request.user.is_authenticated:
         auth_logout(request)
         messages.success(request, 'You have been successfully logged out.')
@@ -121,24 +140,23 @@ def logout(request):
 
 def verify_email(request, token):
     """Handle email verification via token"""
-    try:
-        email_verification = EmailVerification.objects.get(verification_token=token)
-        
-        if not email_verification.is_verified:
-            email_verification.is_verified = True
-            email_verification.verified_at = timezone.now()
-            email_verification.save()
-            messages.success(request, 'Your email has been successfully verified!')
-        else:
-            messages.info(request, 'Your email is already verified.')
-        
-        # Redirect to login if not authenticated, otherwise to home
-        if request.user.is_authenticated:
-            return redirect('home')
-        else:
-            return redirect('login')
-    except EmailVerification.DoesNotExist:
+    # Mark as verified in a single UPDATE; only unverified rows match
+    updated = EmailVerification.objects.filter(
+        verification_token=token, is_verified=False
+    ).update(is_verified=True, verified_at=timezone.now())
+    
+    if updated:
+        messages.success(request, 'Your email has been successfully verified!')
+    elif EmailVerification.objects.filter(verification_token=token).exists():
+        messages.info(request, 'Your email is already verified.')
+    else:
         messages.error(request, 'Invalid verification link.')
         return redirect('login')
+    
+    # Redirect to login if not authenticated, otherwise to home
+    if request.user.is_authenticated:
+        return redirect('home')
+    else:
+        return redirect('login')
 
 
@@ -0,0 +1,73 @@
+from django.utils import timezone
+from decimal import Decimal
+from .wallet import Wallet
+from .rpc import RPC
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def get_wallet_instance(user_wallet):
+    """
+    Build the HD wallet for a UserWallet, loading its secrets if they were deferred.
+    
+    request.user.user_wallet is fetched without entropy and passphrase, so both
+    are read here in a single query rather than one query per field.
+    """
+    deferred = user_wallet.get_deferred_fields() & {'entropy', 'passphrase'}
+    if deferred:
+        user_wallet.refresh_from_db(fields=sorted(deferred))
+    return Wallet(user_wallet.entropy, user_wallet.passphrase)
+
+
+def get_receive_address(user_wallet):
+    """
+    Return the wallet's receive address, deriving and caching it on first use.
+    
+    The address depends only on the stored entropy and passphrase, so it is
+    derived once and kept on the UserWallet row for later requests.
+    """
+    if not user_wallet.receive_address:
+        wallet_instance = get_wallet_instance(user_wallet)
+        user_wallet.receive_address = wallet_instance.get_wallet().address()
+        user_wallet.save(update_fields=['receive_address'])
+    return user_wallet.receive_address
+
+
+def sync_user_evr_balance(user_wallet):
+    """
+    Sync user's EVR balance from blockchain using getaddressbalance RPC command.
+    
+    Args:
+        user_wallet: UserWallet instance to update
+        
+    Returns:
+        Decimal: The balance amount, or None if failed
+        
+    Side effects:
+        - Updates user_wallet.evr_liquidity with the balance from the RPC
+        - Updates user_wallet.last_balance_update timestamp
+        - Saves changes to database
+    """
+    try:
+        # Get wallet address
+        address = get_receive_address(user_wallet)
+        
+        # Call getaddressbalance RPC command
+        balance_data = RPC.getaddressbalance(address)
+        
+        # Extract balance from response: {"balance": 0, "received": 0}
+        if isinstance(balance_data, dict) and 'balance' in balance_data:
+            balance = Decimal(str(balance_data['balance']))
+            user_wallet.evr_liquidity = balance
+            user_wallet.last_balance_update = timezone.now()
+            user_wallet.save(update_fields=['evr_liquidity', 'last_balance_update'])
+            return balance
+        else:
+            logger.warning("Unexpected balance response format: %r", balance_data)
+            return None
+            
+    except Exception:
+        # Log the user id rather than username so the error path needs no extra query
+        logger.exception("Error syncing balance for user %s", user_wallet.user_id)
+        return None
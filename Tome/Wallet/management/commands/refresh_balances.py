@@ -0,0 +1,40 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from Wallet.models import UserWallet
+from Wallet.balances import sync_user_evr_balance
+
+
+class Command(BaseCommand):
+    help = 'Refresh stale EVR balances for recently active users (run periodically, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-minutes', type=int, default=5,
+            help='Refresh wallets whose balance is older than this many minutes'
+        )
+        parser.add_argument(
+            '--active-days', type=int, default=30,
+            help='Only refresh wallets of users who logged in within this many days'
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        stale_before = now - timedelta(minutes=options['stale_minutes'])
+        active_since = now - timedelta(days=options['active_days'])
+        
+        # Inactive users are skipped so they don't cost node RPC calls
+        wallets = UserWallet.objects.filter(
+            Q(last_balance_update__isnull=True) | Q(last_balance_update__lt=stale_before),
+            user__last_login__gte=active_since,
+        )
+        
+        synced = failed = 0
+        for user_wallet in wallets.iterator(chunk_size=500):
+            if sync_user_evr_balance(user_wallet) is None:
+                failed += 1
+            else:
+                synced += 1
+        
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {synced} wallet balance(s), {failed} failed'))
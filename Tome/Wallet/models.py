@@ -1,13 +1,16 @@
 from django.db import models
 from django.contrib.auth.models import User
 from decimal import Decimal
+from hdwallet import cryptocurrencies
+from hdwallet.derivations import BIP44Derivation, CHANGES
 
 # Create your models here.
 class UserWallet(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='user_wallet')
     name = models.CharField(max_length=256, default='My Wallet')
-    entropy = models.CharField(max_length=256)
-    passphrase = models.CharField(max_length=256, blank=True)
+    entropy = models.BinaryField(max_length=32)  # raw BIP39 entropy bytes
+    passphrase = models.CharField(max_length=100, blank=True)
+    receive_address = models.CharField(max_length=64, blank=True)  # cached, derived from entropy + passphrase
     evr_liquidity = models.DecimalField(max_digits=20, decimal_places=8, default=Decimal('0'))
     last_balance_update = models.DateTimeField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -17,12 +20,27 @@ class UserWallet(models.Model):
 
 class WalletAddress(models.Model):
     wallet = models.ForeignKey(UserWallet, on_delete=models.CASCADE, related_name='addresses')
-    address = models.CharField(max_length=256)
-    wif = models.CharField(max_length=256)
+    address = models.CharField(max_length=64, db_index=True)  # Base58 addresses are ~34 chars
     account = models.PositiveIntegerField()
     index = models.PositiveIntegerField()
     is_change = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        # One row per BIP44 derivation path; also indexes lookups by path
+        unique_together = ['wallet', 'account', 'is_change', 'index']
+    
+    def get_wif(self, wallet_instance):
+        """
+        Derive this address's WIF private key from its BIP44 path.
+        
+        The key is deterministic given the wallet's seed, so it is never stored;
+        wallet_instance is the Wallet built from the parent UserWallet.
+        """
+        change = CHANGES.INTERNAL_CHAIN if self.is_change else CHANGES.EXTERNAL_CHAIN
+        return wallet_instance.get_wallet().from_derivation(
+            BIP44Derivation(cryptocurrencies.Evrmore.COIN_TYPE, self.account, change, self.index)
+        ).wif()
+    
     def __str__(self):
         return f"WalletAddress(address={self.address}, index={self.index})"
\ No newline at end of file
@@ -1,8 +1,22 @@
+import atexit
 from decouple import config
 from evrmore_rpc import EvrmoreClient
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 RPC = EvrmoreClient(datadir=config('RPC_DATADIR', default='/tmp/evrmore'))
 
+# Share one keep-alive connection pool across all RPC calls in this process. Only
+# connection failures are retried: the request never reached the node, so even
+# non-idempotent calls like sendtoaddress are safe to resend.
+RPC.initialize_sync()
+RPC.sync_session.mount(RPC.url, HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=config('RPC_POOL_MAXSIZE', default=50, cast=int),
+    max_retries=Retry(total=3, connect=3, read=0, status=0, backoff_factor=0.2),
+))
+atexit.register(RPC.sync_session.close)
+
 
 def create_raw_transaction(inputs, outputs):
     """
@@ -1,3 +1,107 @@
-from django.test import TestCase
+from django.test import TestCase, Client
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from .models import UserWallet
+from . import balances
+
 
 # Create your tests here.
+class SyncBalanceTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.sync_url = reverse('sync_balance')
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', email='test@example.com')
+        cls.user_wallet = UserWallet.objects.create(
+            user=cls.user, name='Main', entropy=bytes(16), receive_address='EXampleAddress'
+        )
+    
+    def setUp(self):
+        # The throttle lives in the cache, which outlives each test's transaction
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = Client()
+        self.client.force_login(self.user)
+    
+    def sync(self):
+        """Request a sync and return the message it added"""
+        response = self.client.get(self.sync_url)
+        return [str(message) for message in get_messages(response.wsgi_request)][-1]
+    
+    @mock.patch.object(balances.RPC, 'getaddressbalance', create=True)
+    def test_sync_balance_throttles_repeat_syncs(self, getaddressbalance):
+        """Test that a second sync within the interval does not call the node"""
+        getaddressbalance.return_value = {'balance': 5, 'received': 5}
+        
+        self.assertIn('Current balance: 5 EVR', self.sync())
+        self.assertIn('moments ago', self.sync())
+        
+        self.assertEqual(getaddressbalance.call_count, 1)
+        self.user_wallet.refresh_from_db()
+        self.assertEqual(self.user_wallet.evr_liquidity, Decimal('5'))
+    
+    @mock.patch.object(balances.RPC, 'getaddressbalance', create=True)
+    def test_failed_sync_releases_throttle(self, getaddressbalance):
+        """Test that a failed sync can be retried immediately"""
+        getaddressbalance.side_effect = [ConnectionError('node down'), {'balance': 7, 'received': 7}]
+        
+        with self.assertLogs(balances.logger, 'ERROR'):
+            self.assertIn('Failed to sync balance', self.sync())
+        self.assertIn('Current balance: 7 EVR', self.sync())
+        
+        self.assertEqual(getaddressbalance.call_count, 2)
+
+
+class RefreshBalancesCommandTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        
+        def make_wallet(username, last_login, last_balance_update):
+            user = User.objects.create_user(username=username, email=f'{username}@example.com')
+            User.objects.filter(pk=user.pk).update(last_login=last_login)
+            return UserWallet.objects.create(
+                user=user, name=username, entropy=bytes(16), receive_address=f'E{username}',
+                last_balance_update=last_balance_update
+            )
+        
+        cls.stale = make_wallet('stale', now, now - timedelta(minutes=10))
+        cls.never_synced = make_wallet('neversynced', now, None)
+        cls.fresh = make_wallet('fresh', now, now - timedelta(minutes=1))
+        cls.inactive = make_wallet('inactive', now - timedelta(days=60), now - timedelta(minutes=10))
+        cls.never_logged_in = make_wallet('neverloggedin', None, None)
+    
+    @mock.patch.object(balances.RPC, 'getaddressbalance', create=True)
+    def test_refreshes_only_stale_wallets_of_active_users(self, getaddressbalance):
+        """Test that fresh wallets and inactive users are skipped"""
+        getaddressbalance.return_value = {'balance': 3, 'received': 3}
+        out = StringIO()
+        
+        call_command('refresh_balances', stdout=out)
+        
+        synced = {call.args[0] for call in getaddressbalance.call_args_list}
+        self.assertEqual(synced, {'Estale', 'Eneversynced'})
+        self.assertIn('Refreshed 2 wallet balance(s), 0 failed', out.getvalue())
+        self.stale.refresh_from_db()
+        self.assertEqual(self.stale.evr_liquidity, Decimal('3'))
+    
+    @mock.patch.object(balances.RPC, 'getaddressbalance', create=True)
+    def test_options_widen_the_selection(self, getaddressbalance):
+        """Test that --stale-minutes and --active-days adjust which wallets are synced"""
+        getaddressbalance.return_value = {'balance': 3, 'received': 3}
+        
+        call_command('refresh_balances', '--stale-minutes=0', '--active-days=90', stdout=StringIO())
+        
+        synced = {call.args[0] for call in getaddressbalance.call_args_list}
+        self.assertEqual(synced, {'Estale', 'Eneversynced', 'Efresh', 'Einactive'})
@@ -1,52 +1,16 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.utils import timezone
-from decimal import Decimal
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
 from .models import UserWallet
 from .wallet import Wallet
 from .rpc import RPC
+from .balances import get_wallet_instance, get_receive_address, sync_user_evr_balance
 from hdwallet.entropies import BIP39Entropy
 
-
-def _sync_user_evr_balance(user_wallet):
-    """
-    Sync user's EVR balance from blockchain using getaddressbalance RPC command.
-    
-    Args:
-        user_wallet: UserWallet instance to update
-        
-    Returns:
-        Decimal: The balance amount, or None if failed
-        
-    Side effects:
-        - Updates user_wallet.evr_liquidity with the balance from the RPC
-        - Updates user_wallet.last_balance_update timestamp
-        - Saves changes to database
-    """
-    try:
-        # Get wallet address
-        wallet_instance = Wallet(user_wallet.entropy, user_wallet.passphrase)
-        wallet = wallet_instance.get_wallet()
-        address = wallet.address()
-        
-        # Call getaddressbalance RPC command
-        balance_data = RPC.getaddressbalance(address)
-        
-        # Extract balance from response: {"balance": 0, "received": 0}
-        if isinstance(balance_data, dict) and 'balance' in balance_data:
-            balance = Decimal(str(balance_data['balance']))
-            user_wallet.evr_liquidity = balance
-            user_wallet.last_balance_update = timezone.now()
-            user_wallet.save()
-            return balance
-        else:
-            print(f"Unexpected balance response format: {balance_data}")
-            return None
-            
-    except Exception as e:
-        print(f"Error syncing balance for user {user_wallet.user.username}: {str(e)}")
-        return None
+# Minimum seconds between balance syncs for the same wallet
+BALANCE_SYNC_INTERVAL = 30
 
 
 # Create your views here.
@@ -74,16 +38,27 @@ def portfolio(request):
                 messages.error(request, 'Wallet name must be 100 characters or less.')
                 return render(request, 'portfolio/index.html', {'user_wallet': user_wallet})
             
-            # Start by generating new entropy
-            entropy = BIP39Entropy.generate(128)
+            # Validate passphrase length
+            if len(passphrase) > 100:
+                messages.error(request, 'Passphrase must be 100 characters or less.')
+                return render(request, 'portfolio/index.html', {'user_wallet': user_wallet})
             
-            # Save the new wallet to the database
-            user_wallet = UserWallet.objects.create(
-                user=request.user,
-                name=wallet_name,
-                entropy=entropy,
-                passphrase=passphrase
-            )
+            # Start by generating new entropy, stored as raw bytes
+            entropy = bytes.fromhex(BIP39Entropy.generate(128))
+            
+            # Save the new wallet to the database along with its receive address
+            try:
+                with transaction.atomic():
+                    user_wallet = UserWallet.objects.create(
+                        user=request.user,
+                        name=wallet_name,
+                        entropy=entropy,
+                        passphrase=passphrase,
+                        receive_address=Wallet(entropy, passphrase).get_wallet().address()
+                    )
+            except IntegrityError:
+                # A concurrent submission (e.g. a double-click) already created this user's wallet
+                return redirect('portfolio')
             
             messages.success(request, f'Wallet "{wallet_name}" created successfully!')
             return redirect('portfolio')
@@ -102,13 +77,22 @@ def sync_balance(request):
         messages.error(request, 'No wallet found to sync balance.')
         return redirect('portfolio')
     
+    # Allow one node round-trip per wallet per interval so repeat clicks don't pile up RPC calls
+    throttle_key = f'wallet-sync:{user_wallet.pk}'
+    if not cache.add(throttle_key, True, timeout=BALANCE_SYNC_INTERVAL):
+        messages.info(request, 'A balance sync ran moments ago. Please wait a few seconds before syncing again.')
+        return redirect('portfolio')
+    
     try:
-        balance = _sync_user_evr_balance(user_wallet)
+        balance = sync_user_evr_balance(user_wallet)
         if balance is not None:
             messages.success(request, f'Balance synced successfully! Current balance: {balance} EVR')
         else:
+            # Release the throttle so the user can retry a failed sync right away
+            cache.delete(throttle_key)
             messages.error(request, 'Failed to sync balance. Please try again.')
     except Exception as e:
+        cache.delete(throttle_key)
         messages.error(request, f'Error syncing balance: {str(e)}')
     
     return redirect('portfolio')
@@ -123,7 +107,7 @@ def backup_wallet(request):
         return redirect('portfolio')
     
     # Generate mnemonic from stored entropy
-    wallet_instance = Wallet(user_wallet.entropy, user_wallet.passphrase)
+    wallet_instance = get_wallet_instance(user_wallet)
     mnemonic = wallet_instance.get_mnemonic()
     
     context = {
@@ -141,9 +125,7 @@ def recieve_funds(request):
         return redirect('portfolio')
     
     # Get wallet address
-    wallet_instance = Wallet(user_wallet.entropy, user_wallet.passphrase)
-    wallet = wallet_instance.get_wallet()
-    address = wallet.address()
+    address = get_receive_address(user_wallet)
     
     context = {
         'address': address,
@@ -177,7 +159,7 @@ def send_funds(request):
             return redirect('send_funds')
         
         # Get wallet instance
-        wallet_instance = Wallet(user_wallet.entropy, user_wallet.passphrase)
+        wallet_instance = get_wallet_instance(user_wallet)
         wallet = wallet_instance.get_wallet()
         
         # Create and send transaction via RPC
@@ -1,17 +1,29 @@
+from functools import lru_cache
 from hdwallet import HDWallet, cryptocurrencies
 from hdwallet.entropies import BIP39Entropy
 from hdwallet.mnemonics import BIP39Mnemonic, BIP39_MNEMONIC_LANGUAGES as LANGUAGES
+from hdwallet.seeds import BIP39Seed
 from hdwallet.derivations import BIP44Derivation, CHANGES
 
 
+@lru_cache(maxsize=1024)
+def _bip39_seed(entropy, passphrase, language):
+    # PBKDF2 (2048 rounds of HMAC-SHA512) dominates wallet construction and is
+    # fully determined by its inputs, so derive each seed once per process
+    mnemonic = BIP39Mnemonic.from_entropy(BIP39Entropy(entropy), language)
+    return BIP39Seed.from_mnemonic(BIP39Mnemonic(mnemonic), passphrase=passphrase)
+
+
 class Wallet:
     def __init__(self, entropy, passphrase='', language=LANGUAGES.ENGLISH):
         self.account = 0
-        self.entropy = entropy
+        # BinaryField values come back as memoryview on some database backends
+        self.entropy = bytes(entropy) if isinstance(entropy, memoryview) else entropy
         self.language = language
         self.passphrase = passphrase
         
     def get_mnemonic(self): return BIP39Mnemonic.from_entropy(BIP39Entropy(self.entropy), self.language)
-    def get_wallet(self): return HDWallet(cryptocurrencies.Evrmore, passphrase=self.passphrase).from_mnemonic(BIP39Mnemonic(self.get_mnemonic()))
+    def get_seed(self): return _bip39_seed(self.entropy, self.passphrase, self.language)
+    def get_wallet(self): return HDWallet(cryptocurrencies.Evrmore, passphrase=self.passphrase).from_seed(BIP39Seed(self.get_seed()))
     def get_addresses(self, count=10): yield [self.get_wallet().from_derivation(BIP44Derivation(cryptocurrencies.Evrmore.COIN_TYPE, self.account, CHANGES.EXTERNAL_CHAIN, i)).address() for i in range(count)]
     
\ No newline at end of file